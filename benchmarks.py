@@ -0,0 +1,142 @@
+"""
+Замеры времени запуска приложения.
+
+Запуск:
+    python benchmarks.py [--books 10000] [--runs 7]
+
+Выводит время импорта модулей проекта (в духе `python -X importtime`)
+и полное время запуска main.py для разных команд: без кэша, с холодным и с теплым кэшем.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+PROJECT_DIR = os.path.dirname(os.path.abspath(__file__))
+MAIN_SCRIPT = os.path.join(PROJECT_DIR, "main.py")
+PROJECT_MODULES = ("main", "lexicon", "books_manager", "book_class")
+
+
+def measure_import_times(module: str, runs: int) -> dict[str, tuple[int, int]]:
+    """
+    Измеряет время импорта модулей проекта с помощью `python -X importtime`.
+
+    Параметры:
+        module (str): Импортируемый модуль;
+        runs (int): Количество запусков (берется лучший результат).
+
+    Возвращает:
+        dict[str, tuple[int, int]]: Для каждого модуля проекта — собственное и накопленное время импорта в мкс.
+    """
+    best = {}
+    for _ in range(runs):
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+            cwd=PROJECT_DIR, capture_output=True, text=True, check=True
+        )
+        for line in result.stderr.splitlines():
+            # Формат строки: "import time:  self [us] | cumulative | imported package"
+            if not line.startswith("import time:") or "|" not in line:
+                continue
+            self_time, cumulative, name = line[len("import time:"):].split("|")
+            name = name.strip()
+            if name not in PROJECT_MODULES or not self_time.strip().isdigit():
+                continue
+            times = (int(self_time), int(cumulative))
+            if name not in best or times[1] < best[name][1]:
+                best[name] = times
+    return best
+
+
+def measure_startup(commands: str, workdir: str, runs: int, cache_filename: str | None = None,
+                    cold_cache: bool = False) -> float:
+    """
+    Измеряет полное время работы main.py (запуск интерпретатора, импорты, загрузка книг, команды).
+
+    Параметры:
+        commands (str): Команды, подаваемые на стандартный ввод;
+        workdir (str): Каталог с файлом database.json;
+        runs (int): Количество запусков (берется лучший результат);
+        cache_filename (str | None): Файл кэша базы данных или None, если кэш не используется;
+        cold_cache (bool): Удалять ли файл кэша перед каждым запуском.
+
+    Возвращает:
+        float: Лучшее время в миллисекундах.
+    """
+    env = dict(os.environ)
+    env.pop("LIBRARY_CACHE_FILE", None)
+    if cache_filename:
+        env["LIBRARY_CACHE_FILE"] = cache_filename
+
+    best = float("inf")
+    for _ in range(runs):
+        if cold_cache and os.path.exists(cache_filename):
+            os.remove(cache_filename)
+        start = time.perf_counter()
+        subprocess.run(
+            [sys.executable, MAIN_SCRIPT], input=commands, cwd=workdir, env=env,
+            stdout=subprocess.DEVNULL, text=True, check=True
+        )
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def create_database(workdir: str, books_count: int):
+    """
+    Создает в каталоге workdir файл database.json с books_count книгами.
+    """
+    books = [
+        {
+            "book_id": book_id,
+            "title": f"Книга {book_id}",
+            "author": f"Автор {book_id % 500}",
+            "year": str(1800 + book_id % 200),
+            "status": "в наличии" if book_id % 3 else "выдана"
+        }
+        for book_id in range(1, books_count + 1)
+    ]
+    with open(os.path.join(workdir, "database.json"), "w", encoding="utf-8") as f:
+        json.dump(books, f, indent=4, ensure_ascii=False)
+
+
+def run_benchmarks(books_count: int, runs: int):
+    """
+    Запускает все замеры и выводит результаты в консоль.
+    """
+    print(f"Python {sys.version.split()[0]}, лучший из {runs} запусков\n")
+
+    print("Время импорта (python -X importtime), мкс:")
+    for module in ("main", "books_manager"):
+        times = measure_import_times(module, runs)
+        print(f"  import {module}:")
+        for name in PROJECT_MODULES:
+            if name in times:
+                print(f"    {name:<15} self {times[name][0]:>7} | cumulative {times[name][1]:>7}")
+    print()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        create_database(workdir, books_count)
+        cache_filename = os.path.join(workdir, "database.cache")
+
+        print(f"Время запуска main.py, мс (книг в базе: {books_count}):")
+        scenarios = (
+            ("exit", "exit\n", None, False),
+            ("menu, exit", "menu\nexit\n", None, False),
+            ("all_books, exit (без кэша)", "all_books\nexit\n", None, False),
+            ("all_books, exit (холодный кэш)", "all_books\nexit\n", cache_filename, True),
+            ("all_books, exit (теплый кэш)", "all_books\nexit\n", cache_filename, False),
+        )
+        for title, commands, cache, cold_cache in scenarios:
+            elapsed = measure_startup(commands, workdir, runs, cache_filename=cache, cold_cache=cold_cache)
+            print(f"  {title:<32} {elapsed:>9.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Замеры времени запуска приложения.")
+    parser.add_argument("--books", type=int, default=10000, help="количество книг в тестовой базе")
+    parser.add_argument("--runs", type=int, default=7, help="количество запусков каждого замера")
+    args = parser.parse_args()
+    run_benchmarks(books_count=args.books, runs=args.runs)
@@ -30,7 +30,30 @@ class Book:
         self.year = year
         self.status = status
 
-        self.dict_view = {
+    def __str__(self):
+        """
+            Возвращает строковое представление объекта Book.
+        """
+        return f'    Книга №{self.book_id}: "{self.title}", {self.author}, {self.year} г. ({self.status})'
+
+    def __getstate__(self) -> tuple[int, str, str, str, str]:
+        """
+            Возвращает состояние книги в виде кортежа уже проверенных значений (используется pickle и кэшем базы данных).
+        """
+        return self._book_id, self._title, self._author, self._year, self._status
+
+    def __setstate__(self, state: tuple[int, str, str, str, str]):
+        """
+            Восстанавливает книгу из состояния без повторной проверки данных.
+        """
+        self._book_id, self._title, self._author, self._year, self._status = state
+
+    @property
+    def dict_view(self) -> dict[str, int | str]:
+        """
+            Возвращает представление книги в виде словаря с актуальными значениями атрибутов.
+        """
+        return {
             "book_id": self.book_id,
             "title": self.title,
             "author": self.author,
@@ -38,12 +61,6 @@ class Book:
             "status": self.status
         }
 
-    def __str__(self):
-        """
-            Возвращает строковое представление объекта Book.
-        """
-        return f'    Книга №{self.book_id}: "{self.title}", {self.author}, {self.year} г. ({self.status})'
-
     @property
     def book_id(self):
         """Возвращает идентификатор книги."""
@@ -1,34 +1,155 @@
 import json
+import marshal
+import os
 from book_class import Book, NotValidDataError
 
+CHANGES_LOG_LIMIT = 1000  # Сколько последних изменений хранится в журнале для синхронизации реплик
+JOURNAL_SIZE_LIMIT = 1_000_000  # Размер файла журнала в байтах, после которого он переписывается заново
+
+
+class ChangesGapError(ValueError):
+    """Исключение для обозначения пропуска версий в изменениях: реплике нужна полная синхронизация."""
+    pass
+
+
 class BooksManager:
     """
     Класс для управления библиотекой книг.
 
     Атрибуты:
         filename (str): Имя файла, в котором хранится база данных книг.
-        books_list (list[Book]): Список объектов книг.
+        books_by_id (dict[int, Book]): Книги по идентификатору в порядке добавления.
+        read_only (bool): Режим реплики: изменения принимаются только через apply_changes и sync_with.
+        cache_filename (str | None): Имя файла кэша разобранной базы данных (None, если кэш не используется).
+        epoch (str | None): Идентификатор истории версий; меняется, только если нумерация версий начинается заново.
+        version (int): Номер версии, присвоенный последнему изменению библиотеки (хранится в файле базы данных).
+        changes_log (list[dict]): Журнал последних изменений (не более CHANGES_LOG_LIMIT записей).
+        log_start_version (int): Версия, после которой начинается журнал изменений.
+        journal_filename (str): Имя файла журнала изменений (по одной записи JSON в строке) рядом с базой данных.
+        journal_version (int): Последняя версия, записанная в файл журнала этим объектом.
+        journal_reset (bool): Нужно ли переписать файл журнала заново (началась новая история версий).
+        journal_id (tuple[int, int] | None): Устройство и inode прочитанного репликой файла журнала.
+        journal_offset (int): Позиция в файле журнала, до которой реплика уже прочитала записи.
     """
 
-    def __init__(self, filename: str):
+    def __init__(self, filename: str, read_only: bool = False, cache_filename: str | None = None):
         """
         Инициализация объекта BooksManager.
 
         Параметры:
             filename (str): Имя файла базы данных книг.
+            read_only (bool): Если True, объект работает как реплика только для чтения.
+            cache_filename (str | None): Имя файла кэша разобранной базы данных.
         """
         self.filename = filename
-        self.books_list = self.load_all_books()
+        self.read_only = read_only
+        self.cache_filename = cache_filename
+        self.journal_filename = f"{filename}.journal"
+        self.journal_id = None
+        self.journal_offset = 0
+        self.load_database()
+
+    @property
+    def books_list(self) -> list[Book]:
+        """Возвращает список книг в порядке добавления."""
+        return list(self.books_by_id.values())
+
+    def load_database(self):
+        """
+        Загружает книги, идентификатор истории и версию из файла базы данных.
+        Журнал изменений начинается заново с загруженной версии.
+        """
+        self.epoch, self.version, books = self.read_database()
+        self.books_by_id = {book.book_id: book for book in books}
+        self.changes_log = []
+        self.log_start_version = self.version
+        self.journal_version = self.version
+        self.journal_reset = False
 
-    def load_all_books(self) -> list[Book]:
+    def read_database(self) -> tuple[str | None, int, list[Book]]:
         """
-        Загружает все книги из файла и создает список объектов Book.
+        Читает файл базы данных и создает список объектов Book.
+        Если задан cache_filename и кэш соответствует файлу базы данных, JSON не разбирается.
+
+        Файл содержит объект {"epoch": ..., "version": ..., "books": [...]};
+        файл в старом формате (только список книг) считается версией 0 без идентификатора истории.
 
         Возвращает:
-            list[Book]: Список объектов Book.
+            tuple[str | None, int, list[Book]]: Идентификатор истории, версия и список объектов Book.
         """
+        if self.cache_filename:
+            cached = self.load_from_cache()
+            if cached is not None:
+                return cached
+            # Сигнатура снимается до чтения: если файл изменится во время разбора, кэш окажется устаревшим
+            signature = self.database_signature()
+
         with open(self.filename, "r", encoding="utf-8") as f:
-            return [Book(**obj) for obj in json.load(f)]
+            data = json.load(f)
+        if isinstance(data, list):
+            data = {"epoch": None, "version": 0, "books": data}
+        epoch, version = data["epoch"], data["version"]
+        books = [Book(**obj) for obj in data["books"]]
+
+        if self.cache_filename:
+            self.save_to_cache(signature, epoch, version, books)
+        return epoch, version, books
+
+    def database_signature(self) -> tuple[int, int]:
+        """
+        Возвращает время изменения и размер файла базы данных, по которым проверяется актуальность кэша.
+
+        Возвращает:
+            tuple[int, int]: Время последнего изменения файла (в наносекундах) и его размер в байтах.
+        """
+        stat = os.stat(self.filename)
+        return stat.st_mtime_ns, stat.st_size
+
+    def load_from_cache(self) -> tuple[str | None, int, list[Book]] | None:
+        """
+        Загружает идентификатор истории, версию и список книг из файла кэша.
+        Книги восстанавливаются без повторной проверки данных, поэтому файл кэша должен быть доступен
+        для записи только владельцу (save_to_cache создает его с правами 0o600).
+
+        Возвращает:
+            tuple[str | None, int, list[Book]] | None: Данные базы или None, если кэш отсутствует, поврежден или устарел.
+        """
+        try:
+            with open(self.cache_filename, "rb") as f:
+                signature, epoch, version, book_states = marshal.loads(f.read())
+            if tuple(signature) != self.database_signature():
+                return None
+            books = []
+            for state in book_states:
+                book = Book.__new__(Book)
+                book.__setstate__(state)
+                books.append(book)
+        except (OSError, EOFError, ValueError, TypeError):
+            return None
+        return epoch, version, books
+
+    def save_to_cache(self, signature: tuple[int, int], epoch: str | None, version: int, books: list[Book]):
+        """
+        Сохраняет разобранную базу данных в файл кэша (формат marshal) вместе с сигнатурой файла базы данных.
+        Кэш необязателен, поэтому ошибки записи игнорируются.
+
+        Параметры:
+            signature (tuple[int, int]): Сигнатура файла базы данных, из которого получены книги.
+            epoch (str | None): Идентификатор истории версий.
+            version (int): Версия базы данных.
+            books (list[Book]): Список объектов Book.
+        """
+        temp_filename = f"{self.cache_filename}.{os.getpid()}.tmp"
+        try:
+            fd = os.open(temp_filename, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with open(fd, "wb") as f:
+                f.write(marshal.dumps((signature, epoch, version, [book.__getstate__() for book in books])))
+            os.replace(temp_filename, self.cache_filename)
+        except OSError:
+            try:
+                os.remove(temp_filename)
+            except OSError:
+                pass
 
     def get_books_list(self) -> dict[str, list | str]:
         """
@@ -37,7 +158,7 @@ class BooksManager:
         Возвращает:
             dict[str, list | str]: Словарь с ключом "books_list" и списком книг или с ключом "error_message" и сообщением об ошибке.
         """
-        if self.books_list:
+        if self.books_by_id:
             return {"books_list": self.books_list}
         return {"error_message": "На данный момент в библиотеке нет книг."}
 
@@ -52,10 +173,11 @@ class BooksManager:
             dict[str, list | str]: Словарь с результатами поиска по заголовку, автору и году или сообщение об ошибке.
         """
         search_data = search_data.upper()  # Приводим строку поиска к верхнему регистру для сравнения
+        books_list = self.books_list
 
-        result_by_title = list(filter(lambda x: search_data in x.title.upper(), self.books_list))
-        result_by_author = list(filter(lambda x: search_data in x.author.upper(), self.books_list))
-        result_by_year = list(filter(lambda x: search_data in x.year.upper(), self.books_list))
+        result_by_title = list(filter(lambda x: search_data in x.title.upper(), books_list))
+        result_by_author = list(filter(lambda x: search_data in x.author.upper(), books_list))
+        result_by_year = list(filter(lambda x: search_data in x.year.upper(), books_list))
 
         if not any((result_by_title, result_by_author, result_by_year)):
             return {"error_message": "Увы, совпадений не найдено."}
@@ -65,6 +187,196 @@ class BooksManager:
             "result_by_year": result_by_year
         }
 
+    def changes_since(self, version: int) -> list[dict] | None:
+        """
+        Возвращает копии изменений, произошедших после указанной версии.
+
+        Параметры:
+            version (int): Последняя версия, известная получателю.
+
+        Возвращает:
+            list[dict] | None: Записи журнала с ключами "version", "operation" и "book" в порядке возрастания версий
+            или None, если этих изменений уже нет в журнале (или такой версии еще не было) и нужна полная синхронизация.
+        """
+        if not self.log_start_version <= version <= self.version:
+            return None
+        return [
+            {**change, "book": dict(change["book"])}
+            for change in self.changes_log[version - self.log_start_version:]
+        ]
+
+    def apply_changes(self, changes: list[dict]) -> int:
+        """
+        Применяет к книгам изменения, полученные из changes_since, и записывает их в свой журнал,
+        чтобы другие реплики могли синхронизироваться с этой.
+        Записи с версией не новее текущей пропускаются, поэтому повторное применение безопасно.
+
+        Параметры:
+            changes (list[dict]): Записи журнала изменений.
+
+        Возвращает:
+            int: Количество примененных изменений.
+
+        Исключения:
+            ChangesGapError: Если в записях пропущена версия и нужна полная синхронизация.
+        """
+        applied = 0
+        for change in changes:
+            if change["version"] <= self.version:
+                continue
+            if change["version"] != self.version + 1:
+                raise ChangesGapError(
+                    f"ОШИБКА: Пропущены изменения после версии {self.version}! Нужна полная синхронизация."
+                )
+
+            book_data = change["book"]
+            book = self.books_by_id.get(book_data["book_id"])
+
+            if change["operation"] == "delete_book":
+                self.books_by_id.pop(book_data["book_id"], None)
+            elif book is None:
+                self.books_by_id[book_data["book_id"]] = Book(**book_data)
+            else:
+                book.title = book_data["title"]
+                book.author = book_data["author"]
+                book.year = book_data["year"]
+                book.status = book_data["status"]
+
+            self.version = change["version"]
+            self.append_to_changes_log({**change, "book": dict(book_data)})
+            applied += 1
+        return applied
+
+    def sync_with(self, leader: "BooksManager") -> dict[str, int]:
+        """
+        Догоняет основной объект BooksManager, применяя только новые изменения.
+        Если история версий сменилась, реплика опередила основной объект или нужных изменений
+        уже нет в журнале, база данных перечитывается из файла целиком.
+
+        Параметры:
+            leader (BooksManager): Объект, в котором выполняются изменения библиотеки.
+
+        Возвращает:
+            dict[str, int]: Словарь с ключом "changes_applied" и количеством примененных изменений
+            или с ключом "books_reloaded" и количеством книг после полной синхронизации.
+        """
+        changes = leader.changes_since(self.version) if self.epoch == leader.epoch else None
+        if changes is None:
+            self.load_database()
+            return {"books_reloaded": len(self.books_by_id)}
+        return {"changes_applied": self.apply_changes(changes)}
+
+    def sync_from_journal(self) -> dict[str, int]:
+        """
+        Догоняет основной объект, работающий в другом процессе, по файлу журнала изменений.
+        Читаются только записи, появившиеся после предыдущей синхронизации, а файл базы данных не разбирается.
+        Если история версий сменилась или в журнале нет нужных изменений, база данных перечитывается целиком.
+
+        Возвращает:
+            dict[str, int]: Словарь с ключом "changes_applied" и количеством примененных изменений
+            или с ключом "books_reloaded" и количеством книг после полной синхронизации.
+        """
+        changes = self.read_journal()
+        if all(change["epoch"] == self.epoch for change in changes):
+            try:
+                return {"changes_applied": self.apply_changes(changes)}
+            except ChangesGapError:
+                pass
+        self.load_database()
+        return {"books_reloaded": len(self.books_by_id)}
+
+    def read_journal(self) -> list[dict]:
+        """
+        Читает из файла журнала записи, появившиеся после предыдущего чтения.
+        Незаконченная последняя строка (запись в процессе) откладывается до следующего чтения;
+        если журнал был переписан заново, он читается с начала.
+
+        Возвращает:
+            list[dict]: Записи журнала с ключами "epoch", "version", "operation" и "book".
+        """
+        try:
+            f = open(self.journal_filename, "rb")
+        except FileNotFoundError:
+            return []
+        with f:
+            stat = os.fstat(f.fileno())
+            journal_id = (stat.st_dev, stat.st_ino)
+            if journal_id != self.journal_id or stat.st_size < self.journal_offset:
+                self.journal_id, self.journal_offset = journal_id, 0
+            f.seek(self.journal_offset)
+            data = f.read()
+
+        complete_lines = data[:data.rfind(b"\n") + 1]
+        self.journal_offset += len(complete_lines)
+        return [json.loads(line) for line in complete_lines.splitlines()]
+
+    def save_to_journal(self):
+        """
+        Дописывает в файл журнала изменения, которых в нем еще нет.
+        Файл переписывается целиком (последними изменениями из changes_log), если началась новая история версий
+        или его размер превысил JOURNAL_SIZE_LIMIT.
+        """
+        try:
+            journal_size = os.path.getsize(self.journal_filename)
+        except OSError:
+            journal_size = 0
+        rewrite = self.journal_reset or journal_size > JOURNAL_SIZE_LIMIT
+
+        changes = self.changes_log if rewrite else self.changes_log[self.journal_version - self.log_start_version:]
+        lines = "".join(json.dumps({"epoch": self.epoch, **change}, ensure_ascii=False) + "\n" for change in changes)
+
+        if rewrite:
+            temp_filename = f"{self.journal_filename}.{os.getpid()}.tmp"
+            try:
+                with open(temp_filename, "w", encoding="utf-8") as f:
+                    f.write(lines)
+                os.replace(temp_filename, self.journal_filename)
+            except Exception:
+                try:
+                    os.remove(temp_filename)
+                except OSError:
+                    pass
+                raise
+        else:
+            with open(self.journal_filename, "a", encoding="utf-8") as f:
+                f.write(lines)
+
+        self.journal_version = self.version
+        self.journal_reset = False
+
+    def register_change(self, operation: str, book: Book):
+        """
+        Присваивает изменению новый номер версии и записывает его в журнал.
+
+        Параметры:
+            operation (str): Название операции ("add_book", "delete_book" или "change_status").
+            book (Book): Книга, затронутая изменением.
+        """
+        if self.epoch is None:
+            # Первое изменение базы в старом формате начинает новую историю версий и новый файл журнала
+            self.epoch = os.urandom(8).hex()
+            self.journal_reset = True
+        self.version += 1
+        self.append_to_changes_log({
+            "version": self.version,
+            "operation": operation,
+            "book": book.dict_view
+        })
+
+    def append_to_changes_log(self, change: dict):
+        """
+        Добавляет запись в журнал изменений и удаляет из него записи сверх CHANGES_LOG_LIMIT.
+
+        Параметры:
+            change (dict): Запись с ключами "version", "operation" и "book".
+        """
+        self.changes_log.append(change)
+
+        excess = len(self.changes_log) - CHANGES_LOG_LIMIT
+        if excess > 0:
+            del self.changes_log[:excess]
+            self.log_start_version += excess
+
     def add_book(self, new_title: str, new_author: str, new_year: str) -> dict[str, Book | str]:
         """
         Добавляет новую книгу в библиотеку.
@@ -77,6 +389,8 @@ class BooksManager:
         Возвращает:
             dict[str, Book | str]: Словарь с добавленной книгой или сообщение об ошибке.
         """
+        if self.read_only:
+            return {"error_message": "ОШИБКА: Реплика библиотеки доступна только для чтения!"}
         try:
             new_book = Book(
                 book_id=self.create_new_id(),
@@ -84,7 +398,8 @@ class BooksManager:
                 author=new_author,
                 year=new_year
             )
-            self.books_list.append(new_book)
+            self.books_by_id[new_book.book_id] = new_book
+            self.register_change("add_book", new_book)
             self.save_to_database()
             return {"new_book": new_book}
         except NotValidDataError as e:
@@ -97,18 +412,41 @@ class BooksManager:
         Возвращает:
             int: Новый уникальный идентификатор.
         """
-        if not self.books_list:
+        if not self.books_by_id:
             return 1
-        previous_max_id = max(book.book_id for book in self.books_list)
+        previous_max_id = max(self.books_by_id)
         return previous_max_id + 1
 
     def save_to_database(self):
         """
-        Сохраняет текущий список книг в файл базы данных.
+        Сохраняет текущий список книг, идентификатор истории и версию в файл базы данных,
+        а затем дописывает новые изменения в файл журнала.
+        Файл базы данных заменяется целиком, чтобы реплики не прочитали его наполовину записанным.
         """
-        book_dicts = [book.dict_view for book in self.books_list]
-        with open(self.filename, "w", encoding="utf-8") as f:
-            json.dump(book_dicts, f, indent=4, ensure_ascii=False)
+        data = {
+            "epoch": self.epoch,
+            "version": self.version,
+            "books": [book.dict_view for book in self.books_by_id.values()]
+        }
+        temp_filename = f"{self.filename}.{os.getpid()}.tmp"
+        try:
+            with open(temp_filename, "w", encoding="utf-8") as f:
+                json.dump(data, f, indent=4, ensure_ascii=False)
+            # Переименование сохраняет время изменения и размер, поэтому сигнатура относится именно к нашему файлу,
+            # даже если после os.replace базу данных успеет заменить другой процесс
+            signature = os.stat(temp_filename)
+            os.replace(temp_filename, self.filename)
+        except Exception:
+            try:
+                os.remove(temp_filename)
+            except OSError:
+                pass
+            raise
+
+        self.save_to_journal()
+
+        if self.cache_filename:
+            self.save_to_cache((signature.st_mtime_ns, signature.st_size), self.epoch, self.version, self.books_list)
 
     def delete_book(self, book_id: str) -> dict[str, Book | str]:
         """
@@ -120,15 +458,18 @@ class BooksManager:
         Возвращает:
             dict[str, Book | str]: Словарь с удаленной книгой или сообщение об ошибке.
         """
+        if self.read_only:
+            return {"error_message": "ОШИБКА: Реплика библиотеки доступна только для чтения!"}
         if not book_id.isdigit():
             return {"error_message": "ОШИБКА: Некорректно введен id книги. Это должно быть целое число!"}
         else:
-            for book in self.books_list:
-                if book.book_id == int(book_id):
-                    self.books_list.remove(book)
-                    self.save_to_database()
-                    return {"book_deleted": book}
-            return {"error_message": f"Книга с id={book_id} не найдена."}
+            book = self.books_by_id.get(int(book_id))
+            if book is None:
+                return {"error_message": f"Книга с id={book_id} не найдена."}
+            del self.books_by_id[book.book_id]
+            self.register_change("delete_book", book)
+            self.save_to_database()
+            return {"book_deleted": book}
 
     def change_status(self, book_id: str, new_status: str) -> dict[str, Book | str]:
         """
@@ -141,18 +482,20 @@ class BooksManager:
         Возвращает:
             dict[str, Book | str]: Словарь с измененной книгой или сообщение об ошибке.
         """
+        if self.read_only:
+            return {"error_message": "ОШИБКА: Реплика библиотеки доступна только для чтения!"}
         if not book_id.isdigit():
             return {"error_message": "ОШИБКА: Некорректно введен id книги. Это должно быть целое число!"}
         else:
-            for book in self.books_list:
-                if book.book_id == int(book_id):
-                    if book.status == new_status:
-                        return {"error_message": f"Данная книга уже имеет статус '{new_status}'."}
-                    else:
-                        try:
-                            book.status = new_status
-                            self.save_to_database()
-                            return {"book_changed": book}
-                        except NotValidDataError as e:
-                            return {"error_message": str(e)}
-            return {"error_message": f"Книга с id={book_id} не найдена."}
+            book = self.books_by_id.get(int(book_id))
+            if book is None:
+                return {"error_message": f"Книга с id={book_id} не найдена."}
+            if book.status == new_status:
+                return {"error_message": f"Данная книга уже имеет статус '{new_status}'."}
+            try:
+                book.status = new_status
+                self.register_change("change_status", book)
+                self.save_to_database()
+                return {"book_changed": book}
+            except NotValidDataError as e:
+                return {"error_message": str(e)}
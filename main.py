@@ -1,15 +1,42 @@
-from books_manager import BooksManager
+from __future__ import annotations
+
+import os
+
 from lexicon import MAIN_MENU, COMMANDS
 
+# Модуль books_manager импортируется в create_books_manager только при первой команде,
+# которой нужна библиотека, чтобы 'menu' и 'exit' не тратили время на импорт и загрузку книг.
+# Анализаторы типов (mypy, pyright) считают TYPE_CHECKING истинным, а при запуске он ложен;
+# так не импортируется модуль typing, который заметно замедляет запуск.
+TYPE_CHECKING = False
+if TYPE_CHECKING:
+    from books_manager import BooksManager
+
+DATABASE_FILENAME = "database.json"
+CACHE_FILENAME_ENV = "LIBRARY_CACHE_FILE"  # Переменная окружения с именем файла кэша базы данных
+
+
+def create_books_manager() -> BooksManager:
+    """
+    Создает объект управления библиотекой.
+    Если задана переменная окружения LIBRARY_CACHE_FILE, разобранная база данных кэшируется в этом файле.
+
+    Возвращает:
+        BooksManager: объект управления библиотекой.
+    """
+    from books_manager import BooksManager
+
+    return BooksManager(DATABASE_FILENAME, cache_filename=os.environ.get(CACHE_FILENAME_ENV))
+
 
-def command_processing(command: str, books_manager: BooksManager):
+def command_processing(command: str, books_manager: BooksManager | None):
 
     """
     Функция по обработке команд, введенных в консоль.
 
     Параметры:
         command (str): одна из команд из MAIN_MENU;
-        books_manager (BooksManager): объект управления библиотекой;
+        books_manager (BooksManager | None): объект управления библиотекой (для команды MENU не нужен);
 
     В ответ выводится некоторая информация в консоль.
     """
@@ -104,7 +131,7 @@ def run_library():
     Цикл прерывается командой exit
     """
 
-    books_manager = BooksManager("database.json")  # Создается объект управления библиотекой
+    books_manager = None  # Объект управления библиотекой создается при первой команде, которой он нужен
 
     print(MAIN_MENU)  # Выводится главное меню с перечнем команд
 
@@ -121,6 +148,8 @@ def run_library():
             break
 
         else:
+            if books_manager is None and command != "MENU":
+                books_manager = create_books_manager()
             command_processing(command=command, books_manager=books_manager)
 
 
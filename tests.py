@@ -1,8 +1,13 @@
+import os
+import subprocess
+import sys
 from datetime import datetime
 
 import pytest
 import json
-from books_manager import BooksManager
+import books_manager
+import main
+from books_manager import BooksManager, ChangesGapError
 from book_class import Book, NotValidDataError
 
 # Тесты для методов BooksManager
@@ -127,6 +132,467 @@ def test_change_status(manager_with_books: BooksManager):
     assert response["books_list"][0].status == "выдана"
 
 
+def test_changes_since(manager_with_books: BooksManager):
+    """
+    Тестируем присвоение версий изменениям и выдачу изменений после указанной версии.
+    """
+    assert manager_with_books.version == 0
+    assert manager_with_books.changes_since(0) == []
+
+    manager_with_books.add_book("New Book", "New Author", "2023")
+    manager_with_books.change_status("1", "выдана")
+    manager_with_books.delete_book("2")
+    manager_with_books.delete_book("100")  # Неудачная операция не создает новую версию
+
+    assert manager_with_books.version == 3
+    assert [change["operation"] for change in manager_with_books.changes_since(0)] == [
+        "add_book", "change_status", "delete_book"
+    ]
+
+    changes = manager_with_books.changes_since(1)
+    assert [change["version"] for change in changes] == [2, 3]
+    assert changes[0]["book"]["status"] == "выдана"
+
+    assert manager_with_books.changes_since(4) is None  # Такой версии еще не было
+
+
+def test_changes_since_returns_copies(manager_with_books: BooksManager):
+    """
+    Тестируем, что изменение полученных записей не меняет журнал изменений.
+    """
+    manager_with_books.add_book("New Book", "New Author", "2023")
+
+    manager_with_books.changes_since(0)[0]["book"]["title"] = "HACK"
+    manager_with_books.changes_since(0)[0]["version"] = 100
+
+    change = manager_with_books.changes_since(0)[0]
+    assert change["book"]["title"] == "New Book"
+    assert change["version"] == 1
+
+
+def test_changes_log_limit(manager_with_books: BooksManager, monkeypatch):
+    """
+    Тестируем ограничение размера журнала изменений.
+    """
+    monkeypatch.setattr(books_manager, "CHANGES_LOG_LIMIT", 2)
+
+    manager_with_books.add_book("New Book", "New Author", "2023")
+    manager_with_books.change_status("1", "выдана")
+    manager_with_books.delete_book("2")
+
+    assert len(manager_with_books.changes_log) == 2
+    assert manager_with_books.changes_since(0) is None  # Изменение с версией 1 уже удалено из журнала
+    assert [change["version"] for change in manager_with_books.changes_since(1)] == [2, 3]
+
+
+def test_version_saved_to_database(manager_with_books: BooksManager):
+    """
+    Тестируем сохранение версии и идентификатора истории в файл базы данных.
+    """
+    manager_with_books.add_book("New Book", "New Author", "2023")
+    manager_with_books.change_status("1", "выдана")
+
+    reloaded = BooksManager(manager_with_books.filename)
+    assert reloaded.version == 2
+    assert reloaded.epoch == manager_with_books.epoch is not None
+    assert reloaded.changes_since(2) == []
+    assert reloaded.changes_since(1) is None
+
+    reloaded.delete_book("2")
+    assert reloaded.version == 3
+
+
+def test_follower_sync(manager_with_books: BooksManager):
+    """
+    Тестируем реплику, которая применяет только изменения основного объекта.
+    """
+    follower = BooksManager(manager_with_books.filename, read_only=True)
+
+    manager_with_books.add_book("New Book", "New Author", "2023")
+    manager_with_books.change_status("1", "выдана")
+    manager_with_books.delete_book("2")
+
+    # Первое изменение базы в старом формате начинает новую историю, поэтому реплика перечитывает файл
+    assert follower.sync_with(manager_with_books) == {"books_reloaded": 2}
+    assert follower.version == 3
+
+    manager_with_books.change_status("1", "в наличии")
+    manager_with_books.add_book("Another Book", "Another Author", "2022")
+    manager_with_books.delete_book("3")
+
+    assert follower.sync_with(manager_with_books) == {"changes_applied": 3}
+    assert follower.version == 6
+    assert [book.dict_view for book in follower.books_list] == [
+        book.dict_view for book in manager_with_books.books_list
+    ]
+    assert follower.books_by_id[1].status == "в наличии"
+    assert 3 not in follower.books_by_id
+
+    assert follower.sync_with(manager_with_books) == {"changes_applied": 0}
+    assert follower.apply_changes(manager_with_books.changes_since(3)) == 0
+
+
+def test_follower_sync_from_follower(manager_with_books: BooksManager):
+    """
+    Тестируем реплику, которая синхронизируется с другой репликой.
+    """
+    manager_with_books.add_book("New Book", "New Author", "2023")
+    first_follower = BooksManager(manager_with_books.filename, read_only=True)
+    second_follower = BooksManager(manager_with_books.filename, read_only=True)
+
+    manager_with_books.change_status("1", "выдана")
+    manager_with_books.delete_book("2")
+    assert first_follower.sync_with(manager_with_books) == {"changes_applied": 2}
+    assert [change["version"] for change in first_follower.changes_since(1)] == [2, 3]
+    assert first_follower.changes_since(0) is None
+
+    assert second_follower.sync_with(first_follower) == {"changes_applied": 2}
+    assert second_follower.version == 3
+    assert [book.dict_view for book in second_follower.books_list] == [
+        book.dict_view for book in manager_with_books.books_list
+    ]
+
+
+def test_apply_changes_with_gap(manager_with_books: BooksManager):
+    """
+    Тестируем отказ применять изменения с пропущенной версией.
+    """
+    manager_with_books.add_book("New Book", "New Author", "2023")
+    follower = BooksManager(manager_with_books.filename, read_only=True)
+    manager_with_books.change_status("1", "выдана")
+    manager_with_books.delete_book("2")
+
+    with pytest.raises(ChangesGapError, match="ОШИБКА: Пропущены изменения после версии 1!"):
+        follower.apply_changes(manager_with_books.changes_since(2))
+    assert follower.version == 1
+
+
+def test_failed_save_removes_temp_file(manager_with_books: BooksManager, tmp_path, monkeypatch):
+    """
+    Тестируем удаление временного файла, если сохранить базу данных не удалось.
+    """
+    def fail_json_dump(*args, **kwargs):
+        raise OSError("No space left on device")
+
+    monkeypatch.setattr(json, "dump", fail_json_dump)
+    with pytest.raises(OSError):
+        manager_with_books.add_book("New Book", "New Author", "2023")
+    assert [path.name for path in tmp_path.iterdir()] == ["database.json"]
+
+
+def test_follower_created_after_changes(manager_with_books: BooksManager):
+    """
+    Тестируем реплику, созданную после изменений: она начинает с версии загруженного файла.
+    """
+    manager_with_books.add_book("New Book", "New Author", "2023")
+    manager_with_books.delete_book("1")
+
+    follower = BooksManager(manager_with_books.filename, read_only=True)
+    assert follower.version == 2
+    assert follower.sync_with(manager_with_books) == {"changes_applied": 0}
+
+    manager_with_books.change_status("2", "выдана")
+    assert follower.sync_with(manager_with_books) == {"changes_applied": 1}
+    assert [book.dict_view for book in follower.books_list] == [
+        book.dict_view for book in manager_with_books.books_list
+    ]
+
+
+def test_follower_sync_after_leader_restart(manager_with_books: BooksManager):
+    """
+    Тестируем синхронизацию реплики с перезапущенным основным объектом.
+    """
+    manager_with_books.add_book("New Book", "New Author", "2023")
+    follower = BooksManager(manager_with_books.filename, read_only=True)
+    manager_with_books.change_status("1", "выдана")
+    assert follower.sync_with(manager_with_books) == {"changes_applied": 1}
+
+    new_leader = BooksManager(manager_with_books.filename)
+    new_leader.delete_book("1")
+    new_leader.change_status("2", "выдана")
+
+    assert follower.sync_with(new_leader) == {"changes_applied": 2}
+    assert 1 not in follower.books_by_id
+    assert follower.books_by_id[2].status == "выдана"
+
+    # Реплика, отставшая больше, чем хранит журнал перезапущенного объекта, перечитывает файл
+    stale_follower = BooksManager(manager_with_books.filename, read_only=True)
+    newest_leader = BooksManager(manager_with_books.filename)
+    newest_leader.delete_book("2")
+    newest_leader = BooksManager(manager_with_books.filename)
+    newest_leader.delete_book("3")
+    assert stale_follower.sync_with(newest_leader) == {"books_reloaded": 0}
+    assert stale_follower.version == newest_leader.version
+
+
+def test_follower_resync_when_history_changes(manager_with_books: BooksManager, tmp_path):
+    """
+    Тестируем полную синхронизацию, если реплика опередила основной объект или сменилась история версий.
+    """
+    manager_with_books.add_book("New Book", "New Author", "2023")
+    follower = BooksManager(manager_with_books.filename, read_only=True)
+
+    # Файл базы данных заменен списком книг в старом формате: история версий начинается заново
+    db_file = tmp_path / "database.json"
+    db_file.write_text(json.dumps([{"book_id": 7, "title": "Book 7", "author": "Author 7", "year": "2007"}]),
+                       encoding="utf-8")
+    new_leader = BooksManager(str(db_file))
+    assert new_leader.version < follower.version
+
+    assert follower.sync_with(new_leader) == {"books_reloaded": 1}
+    assert list(follower.books_by_id) == [7]
+
+    new_leader.add_book("New Book", "New Author", "2023")
+    assert follower.sync_with(new_leader) == {"books_reloaded": 2}
+    assert follower.epoch == new_leader.epoch
+
+
+def test_changes_saved_to_journal(manager_with_books: BooksManager):
+    """
+    Тестируем запись изменений в файл журнала рядом с базой данных, в том числе после перезапуска.
+    """
+    manager_with_books.add_book("New Book", "New Author", "2023")
+    manager_with_books.change_status("1", "выдана")
+    BooksManager(manager_with_books.filename).delete_book("2")
+
+    with open(manager_with_books.journal_filename, encoding="utf-8") as f:
+        changes = [json.loads(line) for line in f]
+    assert [(change["version"], change["operation"]) for change in changes] == [
+        (1, "add_book"), (2, "change_status"), (3, "delete_book")
+    ]
+    assert {change["epoch"] for change in changes} == {manager_with_books.epoch}
+
+
+def test_follower_sync_from_journal(manager_with_books: BooksManager, monkeypatch):
+    """
+    Тестируем реплику из другого процесса: она применяет изменения из журнала, не разбирая базу данных.
+    """
+    manager_with_books.add_book("New Book", "New Author", "2023")
+    follower = BooksManager(manager_with_books.filename, read_only=True)
+
+    manager_with_books.change_status("1", "выдана")
+    new_leader = BooksManager(manager_with_books.filename)
+    new_leader.delete_book("2")
+
+    def fail_json_load(*args, **kwargs):
+        raise AssertionError("База данных не должна разбираться при синхронизации по журналу")
+
+    monkeypatch.setattr(json, "load", fail_json_load)
+    assert follower.sync_from_journal() == {"changes_applied": 2}
+    assert [book.dict_view for book in follower.books_list] == [
+        book.dict_view for book in new_leader.books_list
+    ]
+    assert [change["version"] for change in follower.changes_since(1)] == [2, 3]
+
+    new_leader.change_status("3", "выдана")
+    assert follower.sync_from_journal() == {"changes_applied": 1}
+    assert follower.sync_from_journal() == {"changes_applied": 0}
+    assert follower.books_by_id[3].status == "выдана"
+
+
+def test_follower_sync_from_journal_partial_line(manager_with_books: BooksManager):
+    """
+    Тестируем, что недописанная строка журнала применяется только после того, как будет дописана.
+    """
+    manager_with_books.add_book("New Book", "New Author", "2023")
+    follower = BooksManager(manager_with_books.filename, read_only=True)
+    assert follower.sync_from_journal() == {"changes_applied": 0}
+
+    line = json.dumps({"epoch": manager_with_books.epoch, "version": 2, "operation": "delete_book",
+                       "book": manager_with_books.books_by_id[1].dict_view}) + "\n"
+    with open(manager_with_books.journal_filename, "a", encoding="utf-8") as f:
+        f.write(line[:20])
+    assert follower.sync_from_journal() == {"changes_applied": 0}
+
+    with open(manager_with_books.journal_filename, "a", encoding="utf-8") as f:
+        f.write(line[20:])
+    assert follower.sync_from_journal() == {"changes_applied": 1}
+    assert 1 not in follower.books_by_id
+
+
+def test_follower_sync_from_rewritten_journal(manager_with_books: BooksManager, monkeypatch):
+    """
+    Тестируем полную синхронизацию по журналу при новой истории версий и чтение переписанного журнала.
+    """
+    follower = BooksManager(manager_with_books.filename, read_only=True)
+
+    # Первое изменение базы в старом формате начинает новую историю версий
+    manager_with_books.add_book("New Book", "New Author", "2023")
+    assert follower.sync_from_journal() == {"books_reloaded": 3}
+    assert follower.epoch == manager_with_books.epoch
+
+    monkeypatch.setattr(books_manager, "JOURNAL_SIZE_LIMIT", 0)
+    monkeypatch.setattr(books_manager, "CHANGES_LOG_LIMIT", 1)
+    manager_with_books.change_status("1", "выдана")
+    assert follower.sync_from_journal() == {"changes_applied": 1}
+
+    manager_with_books.change_status("2", "выдана")
+    manager_with_books.delete_book("3")
+    # В переписанном журнале осталось только последнее изменение, поэтому база перечитывается
+    assert follower.sync_from_journal() == {"books_reloaded": 2}
+    assert follower.version == manager_with_books.version
+    assert follower.books_by_id[2].status == "выдана"
+
+
+def test_follower_is_read_only(manager_with_books: BooksManager):
+    """
+    Тестируем невозможность изменять библиотеку через реплику.
+    """
+    follower = BooksManager(manager_with_books.filename, read_only=True)
+
+    response = follower.add_book("New Book", "New Author", "2023")
+    assert response["error_message"] == "ОШИБКА: Реплика библиотеки доступна только для чтения!"
+    assert follower.delete_book("1")["error_message"] == response["error_message"]
+    assert follower.change_status("1", "выдана")["error_message"] == response["error_message"]
+    assert follower.version == 0
+    assert len(follower.books_list) == 2
+
+
+def test_change_status_saved_to_database(manager_with_books: BooksManager):
+    """
+    Тестируем сохранение нового статуса книги в файл базы данных.
+    """
+    manager_with_books.change_status("1", "выдана")
+
+    reloaded = BooksManager(manager_with_books.filename)
+    assert reloaded.books_list[0].status == "выдана"
+
+
+def test_cache_skips_json_parsing(manager_with_books: BooksManager, tmp_path, monkeypatch):
+    """
+    Тестируем загрузку книг из кэша без разбора JSON, если файл базы данных не изменился.
+    """
+    cache_file = str(tmp_path / "database.cache")
+    BooksManager(manager_with_books.filename, cache_filename=cache_file)
+
+    def fail_json_load(*args, **kwargs):
+        raise AssertionError("JSON не должен разбираться при актуальном кэше")
+
+    monkeypatch.setattr(json, "load", fail_json_load)
+    cached_manager = BooksManager(manager_with_books.filename, cache_filename=cache_file)
+    assert [book.dict_view for book in cached_manager.books_list] == [
+        book.dict_view for book in manager_with_books.books_list
+    ]
+
+
+def test_cache_invalidated_by_database_change(manager_with_books: BooksManager, tmp_path):
+    """
+    Тестируем, что кэш не используется после изменения файла базы данных другим объектом.
+    """
+    cache_file = str(tmp_path / "database.cache")
+    BooksManager(manager_with_books.filename, cache_filename=cache_file)
+
+    manager_with_books.add_book("New Book", "New Author", "2023")
+
+    reloaded = BooksManager(manager_with_books.filename, cache_filename=cache_file)
+    assert len(reloaded.books_list) == 3
+    assert reloaded.books_list[-1].title == "New Book"
+
+
+def test_corrupted_cache_ignored(manager_with_books: BooksManager, tmp_path):
+    """
+    Тестируем загрузку книг из JSON, если файл кэша поврежден.
+    """
+    cache_file = tmp_path / "database.cache"
+    cache_file.write_bytes(b"\xff")  # Некорректные данные marshal
+
+    reloaded = BooksManager(manager_with_books.filename, cache_filename=str(cache_file))
+    assert len(reloaded.books_list) == 2
+    assert reloaded.load_from_cache() is not None
+
+
+def test_cache_saved_with_signature_of_written_database(manager_with_books: BooksManager, tmp_path, monkeypatch):
+    """
+    Тестируем, что кэш после сохранения не выдает наши книги за файл, который успел записать другой процесс.
+    """
+    cache_file = str(tmp_path / "database.cache")
+    writer = BooksManager(manager_with_books.filename, cache_filename=cache_file)
+    original_replace = os.replace
+
+    def replace_and_change_database(src, dst):
+        original_replace(src, dst)
+        if dst == writer.filename:
+            monkeypatch.setattr(os, "replace", original_replace)
+            BooksManager(manager_with_books.filename).add_book("Other Book", "Other Author", "2022")
+
+    monkeypatch.setattr(os, "replace", replace_and_change_database)
+    writer.add_book("New Book", "New Author", "2023")
+
+    reloaded = BooksManager(manager_with_books.filename, cache_filename=cache_file)
+    assert [book.title for book in reloaded.books_list] == ["Book 1", "Book 2", "New Book", "Other Book"]
+
+
+def test_cache_not_saved_for_database_changed_while_reading(manager_with_books: BooksManager, tmp_path,
+                                                           monkeypatch):
+    """
+    Тестируем, что кэш не выдает старые книги, если файл базы данных изменился во время чтения.
+    """
+    cache_file = str(tmp_path / "database.cache")
+    original_json_load = json.load
+
+    def load_and_change_database(f):
+        data = original_json_load(f)
+        monkeypatch.setattr(json, "load", original_json_load)
+        writer = BooksManager(manager_with_books.filename)
+        writer.add_book("New Book", "New Author", "2023")
+        return data
+
+    monkeypatch.setattr(json, "load", load_and_change_database)
+    assert len(BooksManager(manager_with_books.filename, cache_filename=cache_file).books_list) == 2
+
+    reloaded = BooksManager(manager_with_books.filename, cache_filename=cache_file)
+    assert len(reloaded.books_list) == 3
+
+
+def test_cache_file_owner_only(manager_with_books: BooksManager, tmp_path):
+    """
+    Тестируем, что файл кэша создается доступным только владельцу.
+    """
+    cache_file = tmp_path / "database.cache"
+    BooksManager(manager_with_books.filename, cache_filename=str(cache_file))
+    assert cache_file.stat().st_mode & 0o777 == 0o600
+
+
+# Тесты для main.py
+
+
+def test_run_library_creates_manager_lazily(manager_with_books: BooksManager, monkeypatch, capsys):
+    """
+    Тестируем, что 'menu' и 'exit' работают без объекта управления библиотекой,
+    а первая команда, которой нужна библиотека, создает его ровно один раз.
+    """
+    created_managers = []
+
+    def create_books_manager():
+        created_managers.append(manager_with_books)
+        return manager_with_books
+
+    monkeypatch.setattr(main, "create_books_manager", create_books_manager)
+
+    commands = iter(["menu", "exit"])
+    monkeypatch.setattr("builtins.input", lambda prompt="": next(commands))
+    main.run_library()
+    assert created_managers == []
+    assert "До новых встреч" in capsys.readouterr().out
+
+    commands = iter(["menu", "all_books", "find_book", "Book 1", "all_books", "exit"])
+    main.run_library()
+    assert len(created_managers) == 1
+    assert '"Book 2"' in capsys.readouterr().out
+
+
+def test_main_import_does_not_import_books_manager():
+    """
+    Тестируем, что импорт main.py не импортирует books_manager и book_class.
+    """
+    result = subprocess.run(
+        [sys.executable, "-c",
+         "import sys, main; print('books_manager' in sys.modules, 'book_class' in sys.modules)"],
+        cwd=os.path.dirname(os.path.abspath(__file__)), capture_output=True, text=True, check=True
+    )
+    assert result.stdout.strip() == "False False"
+
+
 # Тесты для класса Book
 
 